@@ -0,0 +1,148 @@
+# Shared helpers for cord19_analysis.py and streamlit_app.py
+import re
+import pandas as pd
+import numpy as np
+
+# Optional: accelerated word counting (see count_words)
+try:
+    import pyarrow as pa
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+# Copy-on-write lets cleaned frames share unmodified columns with the raw
+# one. It is always on from pandas 3, where setting the option is deprecated.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Only the columns used by the scripts are parsed; everything else in
+# metadata.csv (sha, pdf_json_files, mag_id, ...) is never allocated.
+USECOLS = ['title', 'abstract', 'authors', 'journal', 'publish_time', 'source_x']
+DTYPES = {'title': 'string', 'abstract': 'string', 'authors': 'string',
+          'journal': 'string', 'publish_time': 'string', 'source_x': 'category'}
+
+# Common words excluded from the title word tally
+STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+                        'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'be', 'been',
+                        'covid', '19', 'coronavirus', 'sars', 'cov', 'covid-19', 'novel',
+                        'new', 'study', 'research', 'analysis', 'case', 'effect', 'related'})
+
+# Whitespace-delimited title tokens of 4+ characters that are not stop words.
+# The regex only narrows the candidates; count_title_words() then keeps the
+# tokens for which str.isalpha() holds.
+TOKEN_RE = re.compile(r'(?<!\S)(?!(?:' + '|'.join(re.escape(w) for w in sorted(STOP_WORDS))
+                      + r')(?!\S))\S{4,}(?!\S)')
+
+# Frequencies of the words in titles, most frequent first. A word is a
+# lowercased whitespace-separated token that is not a stop word, is longer
+# than 3 characters and passes str.isalpha(), as in the original tally.
+def count_title_words(titles):
+    tokens = titles.str.lower().str.findall(TOKEN_RE).explode().dropna()
+    return tokens[tokens.str.isalpha()].value_counts()
+
+# publish_time strings as datetimes. Most dates are ISO YYYY-MM-DD and take
+# the fixed-format fast path; only the remainder (e.g. bare years) goes
+# through the mixed parser. Unparseable values become NaT.
+def parse_publish_time(raw_dates):
+    publish_time = pd.to_datetime(raw_dates, format='%Y-%m-%d', errors='coerce', cache=True)
+    residual = publish_time.isna() & raw_dates.notna()
+    if residual.any():
+        publish_time[residual] = pd.to_datetime(raw_dates[residual], format='mixed', errors='coerce', cache=True)
+    return publish_time
+
+# The k most frequent values of col, largest first. Categorical columns are
+# counted with np.bincount over their codes and only the top k get sorted.
+def top_categories(col, k):
+    if not isinstance(col.dtype, pd.CategoricalDtype):
+        return col.value_counts().head(k)
+    codes = col.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(col.cat.categories))
+    k = min(k, np.count_nonzero(counts))
+    if k == 0:
+        return pd.Series([], index=col.cat.categories[:0], dtype='int64', name='count')
+    top_idx = np.argpartition(-counts, k - 1)[:k]
+    top_idx = top_idx[np.argsort(-counts[top_idx], kind='stable')]
+    return pd.Series(counts[top_idx], index=col.cat.categories[top_idx], name='count')
+
+# Papers per publication year. Years span a small integer range, so they are
+# counted with np.bincount; years without papers in between count as zero.
+def count_by_year(col):
+    years = col.dropna().to_numpy(dtype=np.int32)
+    if len(years) == 0:
+        return pd.Series([], dtype='int64', name='count')
+    first = years.min()
+    counts = np.bincount(years - first)
+    return pd.Series(counts, index=np.arange(first, first + len(counts)), name='count')
+
+# Words are runs of non-whitespace, exactly as str.split() sees them. The
+# pandas fallback uses \S+; the Numba kernel recognizes the same Unicode
+# whitespace set from its UTF-8 bytes, so counts do not depend on whether
+# numba is installed.
+WORD_RE = re.compile(r'\S+')
+
+# Counts words per string by walking the raw UTF-8 bytes. buf/offsets follow
+# the Arrow large_string layout: string i is buf[offsets[i]:offsets[i + 1]].
+def count_words_kernel(buf, offsets, out):
+    for i in prange(len(offsets) - 1):
+        count = 0
+        in_word = False
+        k = offsets[i]
+        end = offsets[i + 1]
+        while k < end:
+            ch = buf[k]
+            # Byte length of the whitespace character starting at k, or 0
+            width = 0
+            if ch == 32 or 9 <= ch <= 13 or 28 <= ch <= 31:
+                width = 1
+            elif ch == 0xC2:
+                # U+0085, U+00A0
+                if k + 1 < end and (buf[k + 1] == 0x85 or buf[k + 1] == 0xA0):
+                    width = 2
+            elif ch == 0xE1:
+                # U+1680
+                if k + 2 < end and buf[k + 1] == 0x9A and buf[k + 2] == 0x80:
+                    width = 3
+            elif ch == 0xE2:
+                # U+2000..U+200A, U+2028, U+2029, U+202F, U+205F
+                if k + 2 < end:
+                    b1 = buf[k + 1]
+                    b2 = buf[k + 2]
+                    if b1 == 0x80 and (b2 <= 0x8A or b2 == 0xA8 or b2 == 0xA9 or b2 == 0xAF):
+                        width = 3
+                    elif b1 == 0x81 and b2 == 0x9F:
+                        width = 3
+            elif ch == 0xE3:
+                # U+3000
+                if k + 2 < end and buf[k + 1] == 0x80 and buf[k + 2] == 0x80:
+                    width = 3
+            is_word = width == 0
+            if is_word and not in_word:
+                count += 1
+            in_word = is_word
+            k += max(width, 1)
+        out[i] = count
+
+if njit is not None:
+    count_words_jit = njit(parallel=True, cache=True)(count_words_kernel)
+
+def count_words(col):
+    if njit is None:
+        return col.str.count(WORD_RE).fillna(0).astype('int32')
+    arr = pa.array(col, type=pa.large_string(), from_pandas=True)
+    # Large or concatenated columns come back as a ChunkedArray; each chunk
+    # has its own buffers and its own starting offset
+    chunks = arr.chunks if isinstance(arr, pa.ChunkedArray) else [arr]
+    out = np.empty(len(arr), dtype=np.int32)
+    start = 0
+    for chunk in chunks:
+        n = len(chunk)
+        if n == 0:
+            continue
+        chunk = chunk.cast(pa.large_string())
+        _, offsets, data = chunk.buffers()
+        offsets = np.frombuffer(offsets, dtype=np.int64)[chunk.offset:chunk.offset + n + 1]
+        buf = np.frombuffer(data, dtype=np.uint8) if data is not None else np.empty(0, dtype=np.uint8)
+        count_words_jit(buf, offsets, out[start:start + n])
+        start += n
+    return pd.Series(out, index=col.index)
@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
+import io
+import os
+import matplotlib
+matplotlib.use('Agg')  # Headless backend; figures are only rendered into the page
 import matplotlib.pyplot as plt
 import seaborn as sns
-from collections import Counter
 from wordcloud import WordCloud
 import numpy as np
+from cord19_common import (USECOLS, DTYPES, top_categories, count_by_year,
+                           count_words, count_title_words, parse_publish_time)
 
 # Set page configuration
 st.set_page_config(page_title="CORD-19 Data Explorer", layout="wide", initial_sidebar_state="expanded")
@@ -14,28 +19,80 @@ st.title("🔬 CORD-19 Data Explorer")
 st.write("Interactive exploration of COVID-19 research papers from the CORD-19 dataset")
 st.markdown("---")
 
-# Load data with caching
+# Cleaned data is persisted here so reruns can skip parsing the CSV. Bump
+# CACHE_VERSION whenever prepare_data() changes its columns or dtypes, so a
+# file written by older code is rebuilt instead of reused.
+CACHE_VERSION = 1
+PARQUET_CACHE = f"metadata.cleaned-v{CACHE_VERSION}.parquet"
+
+def parquet_cache_is_fresh():
+    if not os.path.exists(PARQUET_CACHE):
+        return False
+    if not os.path.exists("metadata.csv"):
+        return True
+    return os.path.getmtime(PARQUET_CACHE) >= os.path.getmtime("metadata.csv")
+
+# st.pyplot always saves at 200 dpi, so charts are rasterized here at screen
+# resolution instead and shown as PNG images; the figure is closed afterwards
+FIGURE_DPI = 72
+
+def show_figure(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=FIGURE_DPI, bbox_inches='tight')
+    plt.close(fig)
+    st.image(buf.getvalue())
+
+# Load cleaned data with caching
 @st.cache_data
 def load_data():
+    if parquet_cache_is_fresh():
+        try:
+            return pd.read_parquet(PARQUET_CACHE)
+        except Exception:
+            # Unreadable cache (e.g. truncated): drop it and rebuild from the CSV
+            try:
+                os.remove(PARQUET_CACHE)
+            except OSError:
+                pass
     try:
-        df = pd.read_csv("metadata.csv", low_memory=False)
-        return df
+        df = pd.read_csv("metadata.csv", usecols=lambda c: c in USECOLS, dtype=DTYPES, engine='c')
     except FileNotFoundError:
         st.error("❌ metadata.csv file not found!")
         return None
+    
+    df_cleaned = prepare_data(df)
+    df_cleaned.attrs['original_rows'] = len(df)
+    # Written to a temporary file first and moved into place, so an
+    # interrupted write never leaves a truncated cache behind
+    tmp_path = f"{PARQUET_CACHE}.{os.getpid()}.tmp"
+    try:
+        df_cleaned.to_parquet(tmp_path, compression="zstd")
+        os.replace(tmp_path, PARQUET_CACHE)
+    except (ImportError, OSError):
+        # Caching is best-effort; the CSV path still works without it
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return df_cleaned
 
-# Clean and prepare data
-@st.cache_data
+# Clean and prepare data (only called by the cached load_data)
 def prepare_data(df):
-    df_cleaned = df.copy()
+    # Shallow copy: under copy-on-write only reassigned columns are cloned
+    df_cleaned = df.copy(deep=False)
     
     # Fill missing values
     if 'abstract' in df_cleaned.columns:
-        df_cleaned['abstract'].fillna('', inplace=True)
+        df_cleaned['abstract'] = df_cleaned['abstract'].fillna('')
     if 'authors' in df_cleaned.columns:
-        df_cleaned['authors'].fillna('Unknown', inplace=True)
+        df_cleaned['authors'] = df_cleaned['authors'].fillna('Unknown')
     if 'journal' in df_cleaned.columns:
-        df_cleaned['journal'].fillna('Unknown', inplace=True)
+        df_cleaned['journal'] = df_cleaned['journal'].fillna('Unknown')
+    
+    # Low-cardinality labels are stored as categoricals
+    for c in ('journal', 'source_x'):
+        if c in df_cleaned.columns:
+            df_cleaned[c] = df_cleaned[c].astype('category')
     
     # Remove rows with missing title
     if 'title' in df_cleaned.columns:
@@ -43,30 +100,67 @@ def prepare_data(df):
     
     # Convert date and extract year
     if 'publish_time' in df_cleaned.columns:
-        df_cleaned['publish_time'] = pd.to_datetime(df_cleaned['publish_time'], errors='coerce')
-        df_cleaned['publication_year'] = df_cleaned['publish_time'].dt.year
+        df_cleaned['publish_time'] = parse_publish_time(df_cleaned['publish_time'])
+        df_cleaned['publication_year'] = df_cleaned['publish_time'].dt.year.astype('Int16')
     
     # Create new columns
     if 'abstract' in df_cleaned.columns:
-        df_cleaned['abstract_word_count'] = df_cleaned['abstract'].apply(
-            lambda x: len(str(x).split()) if pd.notna(x) else 0
-        )
+        df_cleaned['abstract_word_count'] = count_words(df_cleaned['abstract'])
     if 'title' in df_cleaned.columns:
-        df_cleaned['title_word_count'] = df_cleaned['title'].apply(
-            lambda x: len(str(x).split()) if pd.notna(x) else 0
-        )
+        df_cleaned['title_word_count'] = count_words(df_cleaned['title']).astype('int16')
     
     return df_cleaned
 
+# Journal choices offered in the sidebar: the 500 most frequent journals,
+# computed once. Rarer journals are reached through the search box.
+@st.cache_data
+def journal_options(_df_cleaned, limit=500):
+    return top_categories(_df_cleaned['journal'], limit).index.tolist()
+
+# All per-tab aggregates of the filtered frame, computed once per filter
+# state. Sliders then only slice these results instead of rescanning columns.
+# Each entry holds a full title vocabulary, so only recent states are kept.
+@st.cache_data(max_entries=32, ttl=3600)
+def summarize(_df_filtered, filter_key):
+    summary = {}
+    if 'abstract_word_count' in _df_filtered.columns:
+        summary['avg_abstract_words'] = _df_filtered['abstract_word_count'].mean()
+    if 'publication_year' in _df_filtered.columns:
+        summary['by_year'] = count_by_year(_df_filtered['publication_year'])
+    if 'journal' in _df_filtered.columns:
+        summary['top_journals'] = top_categories(_df_filtered['journal'], 30)
+    if 'journal' in _df_filtered.columns:
+        summary['unique_journals'] = _df_filtered['journal'].nunique()
+    if 'authors' in _df_filtered.columns:
+        # Distinct author names rather than distinct "A; B; C" author lists
+        authors = _df_filtered['authors'].str.split(';').explode().str.strip()
+        summary['unique_authors'] = authors[(authors != '') & (authors != 'Unknown')].nunique()
+    if 'title' in _df_filtered.columns:
+        summary['word_freq'] = count_title_words(_df_filtered['title'])
+    if 'abstract_word_count' in _df_filtered.columns:
+        summary['abs_hist'] = np.histogram(_df_filtered['abstract_word_count'].to_numpy(), bins=50)
+    if 'title_word_count' in _df_filtered.columns:
+        summary['title_hist'] = np.histogram(_df_filtered['title_word_count'].to_numpy(), bins=30)
+    return summary
+
+# WordCloud layout is slow, so one cloud is kept per filter state. The
+# object holds a PIL image, hence cache_resource rather than cache_data.
+# The cache is shared by all sessions, so it only keeps the most recent clouds.
+@st.cache_resource(max_entries=16, ttl=3600)
+def build_wordcloud(_titles, filter_key):
+    return WordCloud(width=1200, height=600, background_color='white', 
+                     colormap='viridis', max_words=100).generate(' '.join(_titles.astype(str)))
+
 # Load and prepare data
-df = load_data()
+df_cleaned = load_data()
 
-if df is not None:
-    df_cleaned = prepare_data(df)
-    
+if df_cleaned is not None:
     # Sidebar controls
     st.sidebar.header("🎛️ Controls")
     
+    # Filters are combined into one boolean mask and applied with a single .loc
+    mask = pd.Series(True, index=df_cleaned.index)
+    
     # Get year range
     if 'publication_year' in df_cleaned.columns:
         min_year = int(df_cleaned['publication_year'].min())
@@ -75,33 +169,52 @@ if df is not None:
             "Select Year Range",
             min_year, max_year, (min_year, max_year)
         )
-        df_filtered = df_cleaned[
-            (df_cleaned['publication_year'] >= year_range[0]) & 
-            (df_cleaned['publication_year'] <= year_range[1])
-        ]
+        # Evaluated in one fused pass by numexpr when it is installed;
+        # missing years become NaN and fall outside every range
+        years = df_cleaned['publication_year'].to_numpy(dtype='float32', na_value=np.nan)
+        lo, hi = year_range
+        mask = pd.Series(pd.eval("(years >= lo) & (years <= hi)"), index=df_cleaned.index)
     else:
-        df_filtered = df_cleaned
+        year_range = None
     
     # Journal filter
     st.sidebar.subheader("Filter by Journal")
-    if 'journal' in df_filtered.columns:
-        journals = df_filtered['journal'].unique()
+    selected_journals = []
+    journal_query = ""
+    if 'journal' in df_cleaned.columns:
         selected_journals = st.sidebar.multiselect(
             "Select Journals (leave empty for all)",
-            journals,
+            journal_options(df_cleaned),
             default=[]
         )
+        journal_query = st.sidebar.text_input("Search journal").strip()
+        
+        # Papers in a selected journal or in any journal matching the search
+        journal_mask = None
         if selected_journals:
-            df_filtered = df_filtered[df_filtered['journal'].isin(selected_journals)]
+            journal_mask = df_cleaned['journal'].isin(selected_journals)
+        if journal_query:
+            matches = df_cleaned['journal'].str.contains(journal_query, case=False, regex=False, na=False)
+            journal_mask = matches if journal_mask is None else journal_mask | matches
+        if journal_mask is not None:
+            mask &= journal_mask
+    
+    df_filtered = df_cleaned.loc[mask]
+    if df_filtered.empty:
+        st.warning("No papers match the current filters")
+        st.stop()
+    
+    # Hashable description of the active filters, used to key cached results
+    filter_key = (year_range, tuple(selected_journals), journal_query)
+    summary = summarize(df_filtered, filter_key)
     
     # Display statistics
     st.sidebar.markdown("---")
     st.sidebar.subheader("📊 Dataset Statistics")
     st.sidebar.metric("Total Papers", len(df_filtered))
-    st.sidebar.metric("Original Dataset", len(df))
+    st.sidebar.metric("Original Dataset", df_cleaned.attrs.get('original_rows', len(df_cleaned)))
     if 'abstract_word_count' in df_filtered.columns:
-        avg_words = df_filtered['abstract_word_count'].mean()
-        st.sidebar.metric("Avg Abstract Words", f"{avg_words:.0f}")
+        st.sidebar.metric("Avg Abstract Words", f"{summary['avg_abstract_words']:.0f}")
     
     # Main content tabs
     tab1, tab2, tab3, tab4, tab5 = st.tabs([
@@ -117,20 +230,20 @@ if df is not None:
             st.metric("Total Papers", len(df_filtered))
         with col2:
             if 'publication_year' in df_filtered.columns:
-                st.metric("Year Range", f"{int(df_filtered['publication_year'].min())}-{int(df_filtered['publication_year'].max())}")
+                st.metric("Year Range", f"{int(summary['by_year'].index.min())}-{int(summary['by_year'].index.max())}")
         with col3:
             if 'journal' in df_filtered.columns:
-                st.metric("Unique Journals", df_filtered['journal'].nunique())
+                st.metric("Unique Journals", summary['unique_journals'])
         with col4:
             if 'authors' in df_filtered.columns:
-                st.metric("Unique Authors", df_filtered['authors'].nunique())
+                st.metric("Unique Authors", summary['unique_authors'])
         
         st.markdown("---")
         
         # Publications by year chart
         if 'publication_year' in df_filtered.columns:
             st.subheader("Publications Over Time")
-            papers_by_year = df_filtered['publication_year'].value_counts().sort_index()
+            papers_by_year = summary['by_year']
             
             fig, ax = plt.subplots(figsize=(12, 5))
             ax.plot(papers_by_year.index, papers_by_year.values, marker='o', linewidth=2.5, color='#2E86AB', markersize=8)
@@ -139,7 +252,7 @@ if df is not None:
             ax.set_xlabel('Publication Year', fontsize=12)
             ax.set_ylabel('Number of Papers', fontsize=12)
             ax.grid(True, alpha=0.3)
-            st.pyplot(fig)
+            show_figure(fig)
     
     # Tab 2: Top Journals
     with tab2:
@@ -148,7 +261,7 @@ if df is not None:
         num_journals = st.slider("Number of top journals to display", 5, 30, 15)
         
         if 'journal' in df_filtered.columns:
-            top_journals = df_filtered['journal'].value_counts().head(num_journals)
+            top_journals = summary['top_journals'].head(num_journals)
             
             fig, ax = plt.subplots(figsize=(12, 8))
             ax.barh(range(len(top_journals)), top_journals.values, color='#A23B72')
@@ -157,7 +270,7 @@ if df is not None:
             ax.set_title(f'Top {num_journals} Journals Publishing COVID-19 Research', fontsize=14, fontweight='bold')
             ax.set_xlabel('Number of Papers', fontsize=12)
             ax.invert_yaxis()
-            st.pyplot(fig)
+            show_figure(fig)
             
             # Display as table
             st.subheader("Journal Statistics")
@@ -175,26 +288,15 @@ if df is not None:
         num_words = st.slider("Number of top words to display", 10, 50, 20)
         
         if 'title' in df_filtered.columns:
-            all_titles = ' '.join(df_filtered['title'].astype(str)).lower()
-            
-            stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-                         'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'be', 'been',
-                         'covid', '19', 'coronavirus', 'sars', 'cov', 'covid-19', 'novel',
-                         'new', 'study', 'research', 'analysis', 'case', 'effect', 'related'}
-            
-            words = [word for word in all_titles.split() if word.isalpha() and len(word) > 3 and word not in stop_words]
-            word_freq = Counter(words)
-            top_words = word_freq.most_common(num_words)
-            
-            words_list, counts_list = zip(*top_words)
+            top_words = summary['word_freq'].head(num_words)
             
             fig, ax = plt.subplots(figsize=(12, 6))
-            ax.bar(range(len(top_words)), counts_list, color='#F18F01')
+            ax.bar(range(len(top_words)), top_words.values, color='#F18F01')
             ax.set_xticks(range(len(top_words)))
-            ax.set_xticklabels(words_list, rotation=45, ha='right', fontsize=10)
+            ax.set_xticklabels(top_words.index, rotation=45, ha='right', fontsize=10)
             ax.set_title(f'Top {num_words} Most Frequent Words in Paper Titles', fontsize=14, fontweight='bold')
             ax.set_ylabel('Frequency', fontsize=12)
-            st.pyplot(fig)
+            show_figure(fig)
     
     # Tab 4: Visualizations
     with tab4:
@@ -207,34 +309,32 @@ if df is not None:
             if 'abstract_word_count' in df_filtered.columns:
                 st.subheader("Abstract Word Count Distribution")
                 fig, ax = plt.subplots(figsize=(10, 5))
-                ax.hist(df_filtered['abstract_word_count'], bins=50, color='#06A77D', edgecolor='black')
+                abs_counts, abs_edges = summary['abs_hist']
+                ax.bar(abs_edges[:-1], abs_counts, width=np.diff(abs_edges), align='edge', color='#06A77D', edgecolor='black')
                 ax.set_title('Distribution of Abstract Word Counts', fontsize=12, fontweight='bold')
                 ax.set_xlabel('Word Count', fontsize=11)
                 ax.set_ylabel('Frequency', fontsize=11)
-                st.pyplot(fig)
+                show_figure(fig)
         
         # Title word count distribution
         with col2:
             if 'title_word_count' in df_filtered.columns:
                 st.subheader("Title Word Count Distribution")
                 fig, ax = plt.subplots(figsize=(10, 5))
-                ax.hist(df_filtered['title_word_count'], bins=30, color='#FF006E', edgecolor='black')
+                title_counts, title_edges = summary['title_hist']
+                ax.bar(title_edges[:-1], title_counts, width=np.diff(title_edges), align='edge', color='#FF006E', edgecolor='black')
                 ax.set_title('Distribution of Title Word Counts', fontsize=12, fontweight='bold')
                 ax.set_xlabel('Word Count', fontsize=11)
                 ax.set_ylabel('Frequency', fontsize=11)
-                st.pyplot(fig)
+                show_figure(fig)
         
         # Word Cloud
         st.subheader("Word Cloud of Paper Titles")
         if 'title' in df_filtered.columns:
-            all_titles_wordcloud = ' '.join(df_filtered['title'].astype(str))
-            wordcloud = WordCloud(width=1200, height=600, background_color='white', 
-                                 colormap='viridis', max_words=100).generate(all_titles_wordcloud)
+            wordcloud = build_wordcloud(df_filtered['title'], filter_key)
             
-            fig, ax = plt.subplots(figsize=(14, 7))
-            ax.imshow(wordcloud, interpolation='bilinear')
-            ax.axis('off')
-            st.pyplot(fig)
+            # Shown at its native 1200x600 pixels without going through matplotlib
+            st.image(wordcloud.to_array())
     
     # Tab 5: Data Table
     with tab5:
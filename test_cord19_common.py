@@ -0,0 +1,58 @@
+import sys
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from cord19_common import (STOP_WORDS, WORD_RE, count_title_words, count_words,
+                           count_words_kernel)
+
+WHITESPACE = ''.join(chr(c) for c in range(sys.maxunicode + 1) if chr(c).isspace())
+
+SAMPLES = [
+    "",
+    "one",
+    "  leading and trailing  ",
+    "tab\tnew\nline\r\nfeed\x0bvert\x0cform",
+    "no\xa0break thin　ideographic",
+    "à la\xa0carte — ümlaut",
+    "sep\x1cfile\x1dgroup\x1erecord\x1funit\x85next",
+    "every" + WHITESPACE + "separator" + WHITESPACE,
+]
+
+
+def test_kernel_matches_str_split():
+    encoded = [s.encode('utf-8') for s in SAMPLES]
+    buf = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    offsets = np.cumsum([0] + [len(b) for b in encoded], dtype=np.int64)
+    out = np.empty(len(SAMPLES), dtype=np.int32)
+    count_words_kernel(buf, offsets, out)
+    assert out.tolist() == [len(s.split()) for s in SAMPLES]
+
+
+def test_fallback_regex_matches_str_split():
+    assert [len(WORD_RE.findall(s)) for s in SAMPLES] == [len(s.split()) for s in SAMPLES]
+
+
+def test_count_words_multi_chunk_arrow_strings():
+    pytest.importorskip("pyarrow")
+    first = pd.Series(SAMPLES[:4] + [None], dtype='string[pyarrow]')
+    second = pd.Series(SAMPLES[4:], dtype='string[pyarrow]')
+    col = pd.concat([first, second], ignore_index=True)
+    expected = [len(s.split()) if isinstance(s, str) else 0 for s in SAMPLES[:4] + [None] + SAMPLES[4:]]
+    assert count_words(col).tolist() == expected
+    # A sliced column starts partway into its first chunk
+    assert count_words(col.iloc[2:]).tolist() == expected[2:]
+
+
+def test_count_title_words_matches_isalpha_split():
+    titles = ["Ébola and infección in İstanbul",
+              "Non-pharmaceutical interventions: a novel study",
+              "abc\u00b2de \u216babc COVID-19 masks masks",
+              "Masks\u00a0work, masks work"]
+    all_titles = ' '.join(titles).lower()
+    expected = Counter(w for w in all_titles.split()
+                       if w.isalpha() and len(w) > 3 and w not in STOP_WORDS)
+    assert dict(count_title_words(pd.Series(titles))) == dict(expected)